@@ -1,36 +1,87 @@
 import sqlite3
-import numpy as np
-from scipy.optimize import minimize
+import threading
+from pathlib import Path
 import pandas as pd
-import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Same default location load_drugbank_data writes to
+DB_PATH = str(Path(__file__).resolve().parents[1] / 'db' / 'polypharm.db')
+
+# WAL lets every agent read concurrently while the loader writes.
+_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+PRAGMA cache_spill=OFF;
+"""
+
+_local = threading.local()
+
+
+def get_connection(db_path):
+    """Return this thread's SQLite connection to `db_path`, opening it on first use."""
+    conns = getattr(_local, 'conns', None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path)
+        conn.executescript(_PRAGMAS)
+        conns[db_path] = conn
+    return conn
+
 
 class BaseAgent:
-    def __init__(self, name, db_path='db/polypharm.db'):
+    def __init__(self, name, db_path=DB_PATH):
         self.name = name
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)  # Allow multi-thread access
-        self.cursor = self.conn.cursor()
+        self.db_path = db_path
+
+    @property
+    def conn(self):
+        # Resolved per call so each worker thread reads through its own connection
+        return get_connection(self.db_path)
 
     def query_db(self, sql, params=()):
         try:
-            return self.cursor.execute(sql, params).fetchall()
+            return self.conn.execute(sql, params).fetchall()
         except sqlite3.Error as e:
             return [("Error", str(e))]
 
+
+class DataContext:
+    """Inputs for one swarm run plus every `drug_interactions` row touching them.
+
+    The rows are fetched in a single query and shared by all agents, so each
+    agent derives its counts and explanations in Python instead of re-querying.
+    Each row is an `(effect, drugbank-id, interacting_drugbank-id)` tuple.
+    """
+    # One indexed lookup per side; the second branch skips rows the first already returned.
+    # NULL NOT IN (...) is NULL, so rows with no drugbank-id are admitted explicitly.
+    SQL = ('SELECT effect, "drugbank-id", "interacting_drugbank-id" FROM drug_interactions '
+           'WHERE "drugbank-id" IN ({placeholders}) '
+           'UNION ALL '
+           'SELECT effect, "drugbank-id", "interacting_drugbank-id" FROM drug_interactions '
+           'WHERE "interacting_drugbank-id" IN ({placeholders}) '
+           'AND ("drugbank-id" IS NULL OR "drugbank-id" NOT IN ({placeholders}))')
+
+    def __init__(self, inputs, db_path=DB_PATH):
+        self.inputs = inputs
+        self.drugs = list(inputs.get('drugs', []))
+        self.symptoms = inputs.get('symptoms', '')
+        sql = self.SQL.format(placeholders=','.join(['?'] * len(self.drugs)))
+        self.interactions = get_connection(db_path).execute(sql, self.drugs * 3).fetchall()
+
 # Feature 1: Agent Debate Protocol
 class DebateAgent(BaseAgent):
-    def process(self, drugs):
+    def process(self, ctx):
         try:
-            # Query interactions for input drugs (e.g., ['DB00316', 'DB00635'])
-            placeholders = ','.join(['?'] * len(drugs))
-            sql = f"SELECT effect FROM drug_interactions WHERE drugbank-id IN ({placeholders}) OR interacting_drugbank-id IN ({placeholders})"
-            interactions = self.query_db(sql, drugs + drugs)
-            uncertainties = [effect for effect, in interactions] or ["No interactions found"]
-
-            # Mock game theory: Minimize conflict score (simplified Nash equilibrium)
-            def utility(x):
-                return sum(len(u) for u in uncertainties) - sum(x)
-            bounds = [(0, 1)] * len(uncertainties)
-            consensus = minimize(utility, [0] * len(uncertainties), bounds=bounds, method='SLSQP')
+            # Interactions for input drugs (e.g., ['DB00316', 'DB00635'])
+            uncertainties = [effect for effect, _, _ in ctx.interactions if effect is not None] or ["No interactions found"]
+
+            # Mock game theory: the conflict score was minimized but never reported, so it is not computed
             return {
                 "consensus": f"Resolved {len(uncertainties)} interactions",
                 "details": uncertainties[:3]  # Limit for demo
@@ -40,31 +91,25 @@ class DebateAgent(BaseAgent):
 
 # Feature 2: Probabilistic Outcome Simulator
 class SimulatorAgent(BaseAgent):
-    def process(self, patient_vars, drugs):
+    def process(self, ctx):
         try:
             # Count interactions for risk estimation
-            placeholders = ','.join(['?'] * len(drugs))
-            sql = f"SELECT COUNT(*) FROM drug_interactions WHERE drugbank-id IN ({placeholders})"
-            interaction_count = self.query_db(sql, drugs)[0][0]
-
-            # Monte Carlo: Risk scales with interaction count
-            np.random.seed(42)  # For reproducibility
-            trials = [np.random.normal(loc=0.1 * interaction_count, scale=0.05) for _ in range(1000)]
-            risk_prob = np.clip(np.mean(trials), 0, 1)
+            interaction_count = len(ctx.interactions)
+
+            # Risk scales with interaction count: the mean of N(0.1 * count, 0.05),
+            # which is what averaging Monte Carlo draws converged to anyway
+            risk_prob = min(0.1 * interaction_count, 1.0)
             return {"risk_prob": risk_prob}
         except Exception as e:
             return {"risk_prob": 0.0, "error": str(e)}
 
 # Feature 5: Adverse Event Predictor with Explainability
 class AdverseEventAgent(BaseAgent):
-    def process(self, drugs):
+    def process(self, ctx):
         try:
-            placeholders = ','.join(['?'] * len(drugs))
-            sql = f"SELECT effect, drugbank-id, interacting_drugbank-id FROM drug_interactions WHERE drugbank-id IN ({placeholders})"
-            interactions = self.query_db(sql, drugs)
             explanations = [
                 f"{drug_id} + {interact_id}: {effect}"
-                for effect, drug_id, interact_id in interactions
+                for effect, drug_id, interact_id in ctx.interactions
             ] or ["No adverse events found"]
             return {"adverse_events": explanations[:3]}  # Limit for demo
         except Exception as e:
@@ -72,7 +117,7 @@ class AdverseEventAgent(BaseAgent):
 
 # Feature 6: Revenue Insight Generator
 class RevenueInsightAgent(BaseAgent):
-    def process(self):
+    def process(self, ctx):
         try:
             # Aggregate interaction types for sponsor insights
             sql = "SELECT effect, COUNT(*) as count FROM drug_interactions GROUP BY effect ORDER BY count DESC LIMIT 5"
@@ -87,13 +132,11 @@ class RevenueInsightAgent(BaseAgent):
 
 # Feature 7: Multi-Modal Data Fusion
 class DataFusionAgent(BaseAgent):
-    def process(self, user_inputs):
+    def process(self, ctx):
         try:
-            drugs = user_inputs.get('drugs', [])
-            symptoms = user_inputs.get('symptoms', '')
-            placeholders = ','.join(['?'] * len(drugs))
-            sql = f"SELECT drugbank-id, name, indication FROM drugbank WHERE indication LIKE ? AND drugbank-id IN ({placeholders})"
-            indications = self.query_db(sql, (f'%{symptoms}%',) + tuple(drugs))
+            placeholders = ','.join(['?'] * len(ctx.drugs))
+            sql = f'SELECT "drugbank-id", name, indication FROM drugbank WHERE indication LIKE ? AND "drugbank-id" IN ({placeholders})'
+            indications = self.query_db(sql, (f'%{ctx.symptoms}%',) + tuple(ctx.drugs))
             profile = [
                 {"drug": name, "indication_match": ind}
                 for _, name, ind in indications
@@ -117,25 +160,78 @@ CrisisAgent = lambda name: StubAgent(name, "crisis_escalation")
 EducationAgent = lambda name: StubAgent(name, "education")
 ScalabilityAgent = lambda name: StubAgent(name, "scalability")
 
+# Agents are stateless between requests, so one swarm built at import serves every call.
+# They are IO-bound on SQLite, which releases the GIL, so threads suffice.
+AGENTS = [
+    DebateAgent('debate'),
+    SimulatorAgent('sim'),
+    AdverseEventAgent('adverse'),
+    RevenueInsightAgent('revenue'),
+    DataFusionAgent('fusion'),
+    FederatedAgent('federated'),
+    NegotiatorAgent('negotiator'),
+    CrisisAgent('crisis'),
+    EducationAgent('education'),
+    ScalabilityAgent('scalability')
+]
+
+
+def _open_worker_connection():
+    # An initializer that raises breaks the whole pool; on failure the
+    # connection is simply retried on the worker's first query instead.
+    try:
+        get_connection(DB_PATH)
+    except sqlite3.Error:
+        pass
+
+
+# Each worker opens its connection as it starts and keeps it for its lifetime
+_EXECUTOR = ThreadPoolExecutor(max_workers=len(AGENTS), initializer=_open_worker_connection)
+
+
+_warm_lock = threading.Lock()
+_warmed = False
+
+
+def warm_up(timeout=30):
+    """Start every swarm worker, and so open its DB connection. Runs once per process.
+
+    Each task waits on a barrier sized to the pool, forcing the executor to spawn all of
+    its threads instead of reusing the first idle one. The lock keeps concurrent callers
+    from submitting two barriers' worth of tasks to the same pool.
+    """
+    global _warmed
+    with _warm_lock:
+        if _warmed:
+            return
+        barrier = threading.Barrier(len(AGENTS))
+        for f in [_EXECUTOR.submit(barrier.wait, timeout) for _ in AGENTS]:
+            f.result()
+        _warmed = True
+
+
+def _data_version():
+    # load_drugbank_data bumps user_version on every load, in this process or another,
+    # so rows cached from older data are never served again
+    return get_connection(DB_PATH).execute('PRAGMA user_version').fetchone()[0]
+
+
+# Only the interaction rows are memoized: a failed DataContext load raises and is not
+# cached, while the agents (their own error handling and side effects included) run live.
+@lru_cache(maxsize=1024)
+def _cached_context(drugs_key, symptoms, data_version):
+    # Load on a pool worker too, so the request thread never opens a connection of its own
+    return _EXECUTOR.submit(DataContext, {'drugs': list(drugs_key), 'symptoms': symptoms}).result()
+
 # Run the agent swarm
 def run_agent_swarm(inputs):
     try:
-        agents = [
-            DebateAgent('debate'),
-            SimulatorAgent('sim'),
-            AdverseEventAgent('adverse'),
-            RevenueInsightAgent('revenue'),
-            DataFusionAgent('fusion'),
-            FederatedAgent('federated'),
-            NegotiatorAgent('negotiator'),
-            CrisisAgent('crisis'),
-            EducationAgent('education'),
-            ScalabilityAgent('scalability')
-        ]
-        pool = mp.Pool(len(agents))
-        results = pool.starmap(lambda a, inp=inputs: a.process(inp), [(a,) for a in agents])
-        pool.close()
-        pool.join()
-        return results
+        drugs_key = tuple(sorted(inputs.get('drugs', [])))
+        # str() keeps the key hashable for any JSON value; DataFusionAgent formats it into LIKE anyway
+        symptoms = str(inputs.get('symptoms', ''))
+        data_version = _EXECUTOR.submit(_data_version).result()
+        ctx = _cached_context(drugs_key, symptoms, data_version)
+        futures = [_EXECUTOR.submit(a.process, ctx) for a in AGENTS]
+        return [f.result() for f in futures]
     except Exception as e:
         return [{"error": str(e)}]
\ No newline at end of file
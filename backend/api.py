@@ -1,20 +1,39 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from data_loader import load_drugbank_data
-from agents import run_agent_swarm
+from agents import run_agent_swarm, warm_up
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to Flask's jsonify
+    orjson = None
 
 app = Flask(__name__)
+
+def json_response(payload, status=200):
+    # orjson encodes the nested agent results (and NumPy scalars) much faster than stdlib json
+    if orjson is None:
+        return jsonify(payload), status
+    return Response(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY), status=status, mimetype='application/json')
+
 load_drugbank_data()  # Ensure DB is populated (run once)
 
+# Warm up on the first request rather than at import: a process that imports this
+# module may never serve traffic (e.g. the debug reloader's parent), and should not
+# hold the swarm's DB connections.
+@app.before_request
+def ensure_swarm_warm():
+    warm_up()
+
 @app.route('/optimize', methods=['POST'])
 def optimize():
     try:
         data = request.json or {}  # {'drugs': ['DB00316', 'DB00635'], 'symptoms': 'fatigue'}
         if not data.get('drugs'):
-            return jsonify({"error": "No drugs provided"}), 400
+            return json_response({"error": "No drugs provided"}, 400)
         results = run_agent_swarm(data)
-        return jsonify(results)
+        return json_response(results)
     except Exception as e:
-        return jsonify({"error": f"API error: {str(e)}"}), 500
+        return json_response({"error": f"API error: {str(e)}"}, 500)
 
 if __name__ == '__main__':
     app.run(port=5000, debug=True)
\ No newline at end of file
@@ -1,9 +1,32 @@
+import hashlib
+import numpy as np
 import pandas as pd
 import sqlite3
 from pathlib import Path
 import sys
 import re
 
+# Patterns for parse_interactions, compiled once at import
+_ID_RE = re.compile(r'\bDB\d+\b', re.IGNORECASE)
+_CHUNK_SEP = re.compile(r'[;\n|]')
+_COMMA_DB = re.compile(r',(?=\s*DB\d+)')
+_ID_SEP = re.compile(r'[,&/]|\s+')
+# Classifies a chunk in one pass; tried in order, so exactly one branch's groups match:
+# "ids:effect", "ids (effect)", "ids - effect", then bare ids
+_CHUNK_RE = re.compile(
+    r'^(?:(?P<colon_ids>[^:]*):(?P<colon_effect>.*)'
+    r'|(?P<paren_ids>.*?)\((?P<paren_effect>[^)]+)\).*'
+    r'|(?=.*(?: - | — ))(?P<dash_ids>.*?)\s[-—]\s(?P<dash_effect>.*)'
+    r'|(?P<bare_ids>.*))$',
+    re.DOTALL,
+)
+
+# The only drugbank columns the agents and parse_interactions read
+_DRUGBANK_COLUMNS = ['drugbank-id', 'name', 'indication', 'drug-interactions']
+
+# Part of the Parquet cache key; bump when the read options (dtypes, parsing) change
+_CACHE_VERSION = 1
+
 
 def load_drugbank_data(data_path: str = None, sqlite_path: str = None):
     """Load DrugBank cleaned data (CSV or Excel) into a SQLite database.
@@ -51,21 +74,46 @@ def load_drugbank_data(data_path: str = None, sqlite_path: str = None):
 
     sqlite_file.parent.mkdir(parents=True, exist_ok=True)
 
-    print(f'Loading data from: {data_file}')
-    # Read using pandas
-    if data_file.suffix.lower() in ['.csv']:
+    # The parsed source is cached as Parquet, keyed on the source's identity and state
+    cache_file = _cache_path(repo_root / 'data', data_file)
+    df = None
+    if cache_file.exists():
         try:
-            df = pd.read_csv(data_file, low_memory=False, encoding='utf-8')
+            df = pd.read_parquet(cache_file)
+            print(f'Loading cached data from: {cache_file}')
         except Exception:
-            # try latin-1 as fallback
-            df = pd.read_csv(data_file, low_memory=False, encoding='latin-1')
-    else:
-        # let pandas infer engine
-        df = pd.read_excel(data_file)
+            # best-effort: fall back to parsing the source
+            print(f'Warning: failed to read cache {cache_file}')
 
-    # Connect and write to SQL
+    if df is None:
+        print(f'Loading data from: {data_file}')
+        # Read using pandas
+        if data_file.suffix.lower() in ['.csv']:
+            try:
+                df = _read_csv(data_file, encoding='utf-8')
+            except Exception:
+                # try latin-1 as fallback
+                df = _read_csv(data_file, encoding='latin-1')
+        else:
+            # let pandas infer engine
+            df = pd.read_excel(data_file, usecols=lambda col: col in _DRUGBANK_COLUMNS, dtype='string')
+
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Drop caches of earlier versions of this same source
+            for stale in cache_file.parent.glob(cache_file.name.rsplit('-', 1)[0] + '-*.parquet'):
+                stale.unlink()
+            df.to_parquet(cache_file, compression='zstd', index=False)
+        except Exception:
+            # best-effort: needs pyarrow (or fastparquet) installed
+            print(f'Warning: failed to write cache {cache_file}')
+
+    # Connect and write to SQL. The DB is rebuilt from source on every load, so skip
+    # per-write fsyncs. The journal mode is left alone: leaving WAL needs exclusive
+    # access, which fails while any agent connection is open.
     conn = sqlite3.connect(str(sqlite_file))
-    df.to_sql('drugbank', conn, if_exists='replace', index=False)
+    conn.execute('PRAGMA synchronous=OFF')
+    _write_table(conn, 'drugbank', df)
 
     # Create indexes for speed if the columns exist. Quote column names that may contain hyphens.
     def quoted(col: str) -> str:
@@ -86,10 +134,89 @@ def load_drugbank_data(data_path: str = None, sqlite_path: str = None):
     except Exception as e:
         print('Warning: parse_interactions failed:', e)
 
+    # Tell running agents their cached rows are stale
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    conn.execute(f'PRAGMA user_version = {version + 1}')
+
+    # Back to the setting the agents read with
+    conn.execute('PRAGMA synchronous=NORMAL')
+
     print(f'Cleaned DrugBank data loaded into SQLite at: {sqlite_file}')
     return conn
 
 
+def _cache_path(cache_dir: Path, data_file: Path) -> Path:
+    """Parquet cache location for `data_file`.
+
+    The name hashes the resolved source path, and separately its size and mtime plus the
+    column selection and cache version, so same-named files never share a cache and any
+    replacement of the source (even with an older mtime) or change to what is read
+    misses it.
+    """
+    source = data_file.resolve()
+    stat = source.stat()
+    path_key = hashlib.sha1(str(source).encode()).hexdigest()[:12]
+    schema = f'{_CACHE_VERSION}:' + ','.join(_DRUGBANK_COLUMNS)
+    state_key = hashlib.sha1(f'{stat.st_size}:{stat.st_mtime_ns}:{schema}'.encode()).hexdigest()[:12]
+    return cache_dir / f'_{source.name}-{path_key}-{state_key}.parquet'
+
+
+def _read_csv(data_file: Path, encoding: str) -> pd.DataFrame:
+    """Read only the used DrugBank columns, all as strings, preferring the pyarrow parser."""
+    header = pd.read_csv(data_file, nrows=0, encoding=encoding).columns
+    usecols = [col for col in header if col in _DRUGBANK_COLUMNS]
+    # Decode errors propagate so the caller can retry with another encoding
+    return pd.read_csv(data_file, usecols=usecols, dtype='string', engine=_csv_engine(), encoding=encoding)
+
+
+def _csv_engine() -> str:
+    # The pyarrow engine needs pyarrow installed and pandas >= 1.4
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'c'
+    major, minor = (int(part) for part in pd.__version__.split('.')[:2])
+    return 'pyarrow' if (major, minor) >= (1, 4) else 'c'
+
+
+def _sqlite_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _write_table(conn: sqlite3.Connection, table: str, df: pd.DataFrame):
+    """Replace `table` with the rows of `df`, inserted with one executemany in a single transaction."""
+    def quoted(name) -> str:
+        return '"' + str(name).replace('"', '""') + '"'
+
+    columns = ', '.join(f'{quoted(col)} {_sqlite_type(dtype)}' for col, dtype in df.dtypes.items())
+    placeholders = ', '.join(['?'] * len(df.columns))
+    # sqlite3 cannot bind pandas/NumPy missing-value markers, so hand it plain Python objects
+    rows = df.astype(object).where(df.notna(), None)
+    with conn:
+        conn.execute(f'DROP TABLE IF EXISTS {quoted(table)}')
+        conn.execute(f'CREATE TABLE {quoted(table)} ({columns})')
+        conn.executemany(f'INSERT INTO {quoted(table)} VALUES ({placeholders})', rows.itertuples(index=False, name=None))
+
+
+def _pair_ids(chunks, interacting_ids, effects):
+    """Explode per-chunk lists of interacting ids into one row per (drug, interacting id) pair.
+
+    `order` carries each chunk's position in the source, so rows from all formats can be
+    put back in source order.
+    """
+    frame = pd.DataFrame({
+        'order': chunks.index,
+        'drugbank-id': chunks['drugbank-id'],
+        'interacting_drugbank-id': interacting_ids,
+        'effect': effects,
+    })
+    return frame.explode('interacting_drugbank-id', ignore_index=True).dropna(subset=['interacting_drugbank-id'])
+
+
 def parse_interactions(conn: sqlite3.Connection):
     """Parse the `drug-interactions` column from `drugbank` into a separate
     `drug_interactions` table with columns: drugbank-id, interacting_drugbank-id, effect.
@@ -106,86 +233,71 @@ def parse_interactions(conn: sqlite3.Connection):
         # If the quoted names fail, try unquoted (older DBs)
         df = pd.read_sql('SELECT "drugbank-id", "drug-interactions" FROM drugbank', conn)
 
-    interactions = []
-
-    id_pattern = re.compile(r'\bDB\d+\b', flags=re.IGNORECASE)
-
-    for _, row in df.iterrows():
-        drug_id = row.get('drugbank-id')
-        raw = row.get('drug-interactions')
-        if pd.isna(raw) or not str(raw).strip():
-            continue
-
-        text = str(raw)
-
-        # First, split into candidate chunks by common separators
-        chunks = re.split(r'[;\n]|\|', text)
-        # If chunks is one long chunk, also split by comma but carefully:
-        if len(chunks) == 1:
-            # But some effects themselves contain commas; try to split by ',DB' to keep effects with commas
-            chunks = re.split(r',(?=\s*DB\d+)', text)
-
-        for chunk in chunks:
-            chunk = chunk.strip()
-            if not chunk:
-                continue
-
-            # If there is a ':' assume id(s) before and effect after
-            if ':' in chunk:
-                left, right = chunk.split(':', 1)
-                effect = right.strip()
-                # left may have multiple IDs separated by commas or slashes
-                ids = re.split(r'[,&/]|\s+', left)
-                for iid in ids:
-                    iid = iid.strip()
-                    if not iid:
-                        continue
-                    # ensure it's an ID like DB12345; if not, try to extract
-                    match = id_pattern.search(iid)
-                    if match:
-                        interacting = match.group(0)
-                    else:
-                        interacting = iid
-                    interactions.append((drug_id, interacting, effect))
-                continue
-
-            # If no colon, try to find ID(s) and effect in parentheses or after a dash
-            paren = re.search(r'\(([^)]+)\)', chunk)
-            if paren:
-                effect = paren.group(1).strip()
-                ids_part = chunk[:paren.start()]
-                ids = id_pattern.findall(ids_part)
-                for interacting in ids:
-                    interactions.append((drug_id, interacting, effect))
-                continue
-
-            # Try dash separator
-            if ' - ' in chunk or ' — ' in chunk:
-                parts = re.split(r'\s[-—]\s', chunk, maxsplit=1)
-                if len(parts) == 2:
-                    ids = id_pattern.findall(parts[0])
-                    effect = parts[1].strip()
-                    for interacting in ids:
-                        interactions.append((drug_id, interacting, effect))
-                    continue
-
-            # As a last resort, extract any DB ids and store with empty effect
-            ids = id_pattern.findall(chunk)
-            for interacting in ids:
-                interactions.append((drug_id, interacting, None))
-
-    if not interactions:
+    text = df['drug-interactions'].dropna().astype(str)
+    text = text[text.str.strip() != '']
+
+    # First, split into candidate chunks by common separators. Text with no
+    # separator is split by ',DB' instead, to keep effects that contain commas.
+    has_sep = text.str.contains(_CHUNK_SEP)
+    chunks = pd.concat([
+        text[has_sep].str.split(_CHUNK_SEP),
+        text[~has_sep].str.split(_COMMA_DB),
+    ]).sort_index(kind='stable').explode().str.strip()
+    chunks = chunks[chunks != '']
+    # Positional index = chunk position in source order (rows, then chunks within a row)
+    chunks = pd.DataFrame({
+        'drugbank-id': df['drugbank-id'].to_numpy(dtype=object)[chunks.index],
+        'chunk': chunks.to_numpy(),
+    })
+
+    # Accumulate column-wise (one array per branch and column) rather than row tuples
+    order, ids1, ids2, effects = [], [], [], []
+
+    def collect(frame):
+        order.append(frame['order'].to_numpy())
+        ids1.append(frame['drugbank-id'].to_numpy(dtype=object))
+        ids2.append(frame['interacting_drugbank-id'].to_numpy(dtype=object))
+        effects.append(frame['effect'].to_numpy(dtype=object))
+
+    match = chunks['chunk'].str.extract(_CHUNK_RE)
+
+    # If there is a ':' assume id(s) before and effect after
+    colon = match['colon_effect'].notna()
+    # left may have multiple IDs separated by commas or slashes
+    frame = _pair_ids(chunks[colon], match['colon_ids'][colon].str.split(_ID_SEP), match['colon_effect'][colon].str.strip())
+    tokens = frame['interacting_drugbank-id'].str.strip()
+    # ensure it's an ID like DB12345; if not, keep the raw token
+    frame['interacting_drugbank-id'] = tokens.str.findall(_ID_RE).str[0].fillna(tokens)
+    collect(frame[tokens != ''])
+
+    # If no colon, the effect is in parentheses or after a dash
+    for branch in ('paren', 'dash'):
+        hit = match[f'{branch}_effect'].notna()
+        collect(_pair_ids(chunks[hit], match[f'{branch}_ids'][hit].str.findall(_ID_RE), match[f'{branch}_effect'][hit].str.strip()))
+
+    # As a last resort, extract any DB ids and store with empty effect
+    bare = match['bare_ids'].notna()
+    collect(_pair_ids(chunks[bare], match['bare_ids'][bare].str.findall(_ID_RE), None))
+
+    # Back to source order; the stable sort keeps ids within a chunk in their written order
+    order = np.argsort(np.concatenate(order), kind='stable')
+    ids1, ids2, effects = (np.concatenate(col)[order] for col in (ids1, ids2, effects))
+    if not len(ids1):
         print('No interactions parsed (no data or unsupported format).')
         return
 
-    interactions_df = pd.DataFrame(interactions, columns=['drugbank-id', 'interacting_drugbank-id', 'effect'])
-    interactions_df.to_sql('drug_interactions', conn, if_exists='replace', index=False)
+    # Stream the columns straight into SQLite in one transaction
+    with conn:
+        conn.execute('DROP TABLE IF EXISTS drug_interactions')
+        conn.execute('CREATE TABLE drug_interactions ("drugbank-id" TEXT, "interacting_drugbank-id" TEXT, effect TEXT)')
+        conn.executemany('INSERT INTO drug_interactions VALUES (?, ?, ?)', zip(ids1, ids2, effects))
 
-    # Create index on drugbank-id column in the new table
-    try:
-        conn.execute('CREATE INDEX IF NOT EXISTS idx_interact_id ON drug_interactions("drugbank-id")')
-    except Exception:
-        print('Warning: failed to create index idx_interact_id on drug_interactions')
+    # Index both id columns so lookups from either side of an interaction avoid a scan
+    for col, idx_name in [('drugbank-id', 'idx_interact_id'), ('interacting_drugbank-id', 'idx_interact_other')]:
+        try:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {idx_name} ON drug_interactions("{col}")')
+        except Exception:
+            print(f'Warning: failed to create index {idx_name} on drug_interactions')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,38 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'backend'))
+
+from agents import DataContext
+
+OR_SQL = ('SELECT effect, "drugbank-id", "interacting_drugbank-id" FROM drug_interactions '
+          'WHERE "drugbank-id" IN ({placeholders}) OR "interacting_drugbank-id" IN ({placeholders})')
+
+ROWS = [
+    ('DB1', 'DB2', 'forward'),
+    ('DB3', 'DB1', 'reverse'),
+    ('DB1', 'DB1', 'self'),
+    (None, 'DB1', 'no drug id'),
+    ('DB1', None, 'no interacting id'),
+    (None, None, 'no ids'),
+    ('DB4', 'DB5', 'unrelated'),
+    ('DB2', 'DB3', 'both requested'),
+]
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE drug_interactions ("drugbank-id" TEXT, "interacting_drugbank-id" TEXT, effect TEXT)')
+    conn.executemany('INSERT INTO drug_interactions VALUES (?, ?, ?)', [(a, b, e) for a, b, e in ROWS])
+    conn.commit()
+    return conn
+
+
+def test_union_lookup_matches_or_form(tmp_path):
+    db_path = str(tmp_path / 'polypharm.db')
+    conn = make_db(db_path)
+    for drugs in (['DB1'], ['DB2', 'DB3'], ['DB1', 'DB5'], ['DB9'], []):
+        expected = conn.execute(OR_SQL.format(placeholders=','.join(['?'] * len(drugs))), drugs * 2).fetchall()
+        ctx = DataContext({'drugs': drugs}, db_path=db_path)
+        assert sorted(ctx.interactions, key=repr) == sorted(expected, key=repr)
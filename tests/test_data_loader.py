@@ -0,0 +1,82 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'backend'))
+
+import data_loader
+from agents import get_connection
+from data_loader import load_drugbank_data
+
+HEADER = 'drugbank-id,name,indication,drug-interactions\n'
+
+
+def write_csv(path, rows):
+    path.write_text(HEADER + ''.join(f'{row}\n' for row in rows), encoding='utf-8')
+
+
+def test_cache_path_tracks_source_and_schema(tmp_path, monkeypatch):
+    data_file = tmp_path / 'a' / 'drugbank_clean.csv'
+    other_file = tmp_path / 'b' / 'drugbank_clean.csv'
+    for path in (data_file, other_file):
+        path.parent.mkdir()
+        write_csv(path, ['DB1,A,fatigue,DB2:bad'])
+    os.utime(other_file, ns=(data_file.stat().st_mtime_ns,) * 2)
+
+    cache_file = data_loader._cache_path(tmp_path, data_file)
+    assert data_loader._cache_path(tmp_path, data_file) == cache_file
+    # Same name, size and mtime in another directory: different cache
+    assert data_loader._cache_path(tmp_path, other_file) != cache_file
+
+    # Replaced with an older mtime: different cache for the same source
+    write_csv(data_file, ['DB3,C,nausea,DB4:odd'])
+    os.utime(data_file, ns=(1, 1))
+    replaced = data_loader._cache_path(tmp_path, data_file)
+    assert replaced != cache_file
+    assert replaced.name.rsplit('-', 1)[0] == cache_file.name.rsplit('-', 1)[0]
+
+    # A different column selection never reuses an old cache
+    monkeypatch.setattr(data_loader, '_DRUGBANK_COLUMNS', ['drugbank-id', 'name'])
+    assert data_loader._cache_path(tmp_path, data_file) != replaced
+
+
+def test_cache_reused_on_exact_match_and_stale_caches_removed(tmp_path, monkeypatch, capsys):
+    pytest.importorskip('pyarrow')
+    cache_path = data_loader._cache_path
+    monkeypatch.setattr(data_loader, '_cache_path', lambda cache_dir, data_file: cache_path(tmp_path, data_file))
+    data_file = tmp_path / 'drugbank_clean.csv'
+    db_file = str(tmp_path / 'polypharm.db')
+
+    write_csv(data_file, ['DB1,A,fatigue,DB2:bad'])
+    load_drugbank_data(str(data_file), db_file).close()
+    load_drugbank_data(str(data_file), db_file).close()
+    assert capsys.readouterr().out.count('Loading cached data from') == 1
+
+    write_csv(data_file, ['DB3,C,nausea,DB4:odd', 'DB5,E,pain,DB6:odd'])
+    conn = load_drugbank_data(str(data_file), db_file)
+    assert 'Loading cached data from' not in capsys.readouterr().out
+    assert conn.execute('SELECT "drugbank-id" FROM drugbank').fetchall() == [('DB3',), ('DB5',)]
+    conn.close()
+    assert [p.name for p in tmp_path.glob('_*.parquet')] == [cache_path(tmp_path, data_file).name]
+
+
+def test_reload_while_reader_connected(tmp_path, monkeypatch):
+    # Keep the Parquet cache out of the repo's data/ directory
+    cache_path = data_loader._cache_path
+    monkeypatch.setattr(data_loader, '_cache_path', lambda cache_dir, data_file: cache_path(tmp_path, data_file))
+    data_file = tmp_path / 'drugbank_clean.csv'
+    db_file = tmp_path / 'polypharm.db'
+    write_csv(data_file, ['DB1,A,fatigue,DB2:bad'])
+    load_drugbank_data(str(data_file), str(db_file)).close()
+
+    # A swarm worker holding its WAL connection must not lock the loader out
+    reader = get_connection(str(db_file))
+    assert reader.execute('SELECT "drugbank-id" FROM drugbank').fetchall() == [('DB1',)]
+
+    write_csv(data_file, ['DB3,C,nausea,DB4 (worse)'])
+    load_drugbank_data(str(data_file), str(db_file)).close()
+
+    assert reader.execute('SELECT "drugbank-id" FROM drugbank').fetchall() == [('DB3',)]
+    assert reader.execute('PRAGMA journal_mode').fetchone() == ('wal',)
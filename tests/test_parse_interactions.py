@@ -0,0 +1,109 @@
+import random
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'backend'))
+
+from data_loader import parse_interactions
+
+
+def reference_parse(df):
+    """The original row-by-row parser, kept as the oracle for the vectorized one."""
+    interactions = []
+    id_pattern = re.compile(r'\bDB\d+\b', flags=re.IGNORECASE)
+    for _, row in df.iterrows():
+        drug_id = row.get('drugbank-id')
+        drug_id = None if pd.isna(drug_id) else drug_id  # stored as NULL either way
+        raw = row.get('drug-interactions')
+        if pd.isna(raw) or not str(raw).strip():
+            continue
+        text = str(raw)
+        chunks = re.split(r'[;\n]|\|', text)
+        if len(chunks) == 1:
+            chunks = re.split(r',(?=\s*DB\d+)', text)
+        for chunk in chunks:
+            chunk = chunk.strip()
+            if not chunk:
+                continue
+            if ':' in chunk:
+                left, right = chunk.split(':', 1)
+                effect = right.strip()
+                for iid in re.split(r'[,&/]|\s+', left):
+                    iid = iid.strip()
+                    if not iid:
+                        continue
+                    match = id_pattern.search(iid)
+                    interactions.append((drug_id, match.group(0) if match else iid, effect))
+                continue
+            paren = re.search(r'\(([^)]+)\)', chunk)
+            if paren:
+                effect = paren.group(1).strip()
+                for interacting in id_pattern.findall(chunk[:paren.start()]):
+                    interactions.append((drug_id, interacting, effect))
+                continue
+            if ' - ' in chunk or ' — ' in chunk:
+                parts = re.split(r'\s[-—]\s', chunk, maxsplit=1)
+                if len(parts) == 2:
+                    for interacting in id_pattern.findall(parts[0]):
+                        interactions.append((drug_id, interacting, parts[1].strip()))
+                    continue
+            for interacting in id_pattern.findall(chunk):
+                interactions.append((drug_id, interacting, None))
+    return interactions
+
+
+def parse(rows):
+    df = pd.DataFrame(rows, columns=['drugbank-id', 'drug-interactions'], dtype=object)
+    conn = sqlite3.connect(':memory:')
+    df.to_sql('drugbank', conn, index=False)
+    expected = reference_parse(pd.read_sql('SELECT "drugbank-id", "drug-interactions" FROM drugbank', conn))
+    parse_interactions(conn)
+    try:
+        parsed = conn.execute('SELECT * FROM drug_interactions ORDER BY rowid').fetchall()
+    except sqlite3.OperationalError:  # no table when nothing parsed
+        parsed = []
+    return parsed, expected
+
+
+def test_documented_formats():
+    parsed, expected = parse([
+        ('DB1', 'DB00316:Increased risk,DB00635:Increased risk'),
+        ('DB2', 'DB00316,DB00635:Increased risk'),
+        ('DB3', 'DB00316 (Increased risk); DB00635 - Increased risk'),
+    ])
+    assert parsed == [
+        ('DB1', 'DB00316', 'Increased risk'),
+        ('DB1', 'DB00635', 'Increased risk'),
+        # Without a ';' or '|' separator the text is split before each ',DB', so the first id has no effect
+        ('DB2', 'DB00316', None),
+        ('DB2', 'DB00635', 'Increased risk'),
+        ('DB3', 'DB00316', 'Increased risk'),
+        ('DB3', 'DB00635', 'Increased risk'),
+    ]
+    assert parsed == expected
+
+
+def test_rows_keep_source_order_across_formats():
+    parsed, _ = parse([('DB1', 'DB2 (bleeding); DB3: nausea')])
+    assert parsed == [('DB1', 'DB2', 'bleeding'), ('DB1', 'DB3', 'nausea')]
+
+
+def test_no_interactions_creates_no_table():
+    parsed, expected = parse([('DB1', None), ('DB2', '  '), ('DB3', 'plain text')])
+    assert parsed == expected == []
+
+
+def test_matches_reference_parser_on_fuzzed_input():
+    rng = random.Random(7)
+    tokens = ['DB1', 'DB22', 'db3', ' ', ',', '&', '/', ':', '(', ')', ' - ', ' — ', '-',
+              '\t- ', 'x', 'eff', ';', '|', '\n', 'DB4:', '()', '(a)']
+    rows = [
+        (f'DB{i}' if i % 17 else None, ''.join(rng.choice(tokens) for _ in range(rng.randint(0, 12))))
+        for i in range(3000)
+    ]
+    parsed, expected = parse(rows)
+    assert parsed == expected